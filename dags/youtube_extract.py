@@ -1,12 +1,16 @@
 from airflow import DAG
+from airflow.models import Variable
 from airflow.operators.python import PythonOperator
 from airflow.operators.trigger_dagrun import TriggerDagRunOperator
 from datetime import datetime, timedelta
+import contextlib
 import os
-import json
 import logging
+import asyncio
+import aiohttp
+import orjson
 from googleapiclient.discovery import build
-import isodate
+from include.duration import duration_label, iso_to_seconds, seconds_to_readable
 
 # ==========================================
 # 🔑 CONFIGURATION - Reading from .env
@@ -14,150 +18,213 @@ import isodate
 API_KEY = os.getenv("YOUTUBE_API_KEY")
 CHANNEL_ID = os.getenv("YOUTUBE_CHANNEL_ID")
 CHANNEL_HANDLE = os.getenv("YOUTUBE_CHANNEL_HANDLE", "MrBeast")
+PLAYLIST_ITEMS_URL = "https://www.googleapis.com/youtube/v3/playlistItems"
+VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+MAX_CONCURRENT_REQUESTS = 10  # Stay polite with the YouTube API
+MAX_RETRIES = 5  # Per-call retries before failing the task
+RETRY_BACKOFF_SECONDS = 0.5  # Doubled on each attempt
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 # Note: MAX_VIDEOS is no longer used - we extract ALL videos automatically!
 
 
-def iso_duration_to_readable(duration):
-    """Convert ISO 8601 duration to readable format (HH:MM:SS or MM:SS)"""
-    try:
-        td = isodate.parse_duration(duration)
-        total_seconds = int(td.total_seconds())
-        minutes, seconds = divmod(total_seconds, 60)
-        hours, minutes = divmod(minutes, 60)
-        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours > 0 else f"{minutes}:{seconds:02d}"
-    except:
-        return "0:00"
+async def fetch_json(session, url, params):
+    """
+    GET a YouTube Data API endpoint and return the decoded JSON body
+    - Transient failures (429/5xx, dropped connections) are retried with
+      exponential backoff, so one flaky call doesn't replay the whole extraction
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with session.get(url, params=params) as response:
+                if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    logging.warning(f"⚠️ HTTP {response.status} from {url}, retry {attempt + 1}/{MAX_RETRIES}")
+                else:
+                    response.raise_for_status()
+                    return await response.json(loads=orjson.loads)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            logging.warning(f"⚠️ {type(e).__name__} on {url}, retry {attempt + 1}/{MAX_RETRIES}")
+        await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
 
 
-def get_channel_videos(**context):
+def parse_video(video):
+    """Flatten one videos.list item into the JSON output record"""
+    duration = video["contentDetails"]["duration"]
+    duration_seconds = iso_to_seconds(duration)  # Parsed once, reused downstream
+    return {
+        "video_id": video["id"],
+        "title": video["snippet"]["title"],
+        "published_at": video["snippet"]["publishedAt"],
+        "duration": duration,
+        "duration_readable": seconds_to_readable(duration_seconds),
+        "duration_seconds": duration_seconds,
+        "duration_label": duration_label(duration_seconds),
+        # The API sends counts as strings (or omits hidden ones): cast once here
+        "view_count": int(video["statistics"].get("viewCount") or 0),
+        "like_count": int(video["statistics"].get("likeCount") or 0),
+        "comment_count": int(video["statistics"].get("commentCount") or 0),
+    }
+
+
+async def fetch_video_details(session, batch_num, batch_ids, out):
+    """Fetch one batch of video IDs (max 50) and append each video to the NDJSON output"""
+    videos_response = await fetch_json(session, VIDEOS_URL, {
+        "part": "snippet,contentDetails,statistics",
+        "id": ",".join(batch_ids),
+        "key": API_KEY,
+    })
+    logging.info(f"📦 Batch {batch_num}: Received details for {len(videos_response['items'])} videos")
+    for video in videos_response["items"]:
+        out.write(orjson.dumps(parse_video(video)) + b"\n")
+    return len(videos_response["items"])
+
+
+async def collect_channel_videos(uploads_playlist, out):
     """
-    Extract ALL YouTube channel videos automatically
-    - Detects total video count from channel statistics
-    - Handles pagination automatically (50 videos per page)
-    - Prevents duplicates using set()
-    - Batches API requests efficiently
+    Walk the uploads playlist and fetch video details as pages arrive
+    - Each page (max 50 IDs) is dispatched to videos.list immediately,
+      so details are fetched while the next pages are still being listed
+    - At most MAX_CONCURRENT_REQUESTS requests in flight
+    - Videos are streamed to `out` one line each as batches complete,
+      so memory stays bounded by a batch, not by the channel size
+    - Returns the number of videos written
     """
+    video_ids = set()  # Use set to prevent duplicates automatically!
+    detail_tasks = []
+    next_page_token = None
+    page_count = 0
     
-    # Initialize YouTube client
-    youtube = build("youtube", "v3", developerKey=API_KEY)
-    logging.info(f"🚀 Starting extraction for channel: {CHANNEL_HANDLE} (ID: {CHANNEL_ID})")
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Loop until the playlist has no more pages
+        while True:
+            # Request next page of videos (max 50 per page)
+            params = {
+                "part": "contentDetails",
+                "playlistId": uploads_playlist,
+                "maxResults": 50,  # YouTube API max per request
+                "key": API_KEY,
+            }
+            if next_page_token:
+                params["pageToken"] = next_page_token
+            response = await fetch_json(session, PLAYLIST_ITEMS_URL, params)
+            
+            # Keep only IDs not seen on a previous page
+            page_ids = dict.fromkeys(item["contentDetails"]["videoId"] for item in response["items"])
+            new_ids = [video_id for video_id in page_ids if video_id not in video_ids]
+            video_ids.update(new_ids)
+            
+            page_count += 1
+            logging.info(f"📄 Page {page_count}: Found {len(new_ids)} videos (Total: {len(video_ids)})")
+            
+            # Dispatch the details request for this page right away
+            if new_ids:
+                detail_tasks.append(asyncio.create_task(
+                    fetch_video_details(session, page_count, new_ids, out)
+                ))
+            
+            # Check if no more pages
+            next_page_token = response.get("nextPageToken")
+            if not next_page_token:
+                logging.info(f"✅ Reached end of playlist (no more pages)")
+                break
+        
+        logging.info(f"✅ Collected {len(video_ids)} unique video IDs from channel")
+        batch_counts = await asyncio.gather(*detail_tasks)
     
-    # ==========================================
-    # 1️⃣ Get channel info (total videos + uploads playlist)
-    # ==========================================
-    request = youtube.channels().list(
-        part="contentDetails,statistics",  # ✅ Added statistics to get video count
-        id=CHANNEL_ID
-    )
-    response = request.execute()
+    return sum(batch_counts)
+
+
+def get_uploads_playlist_id():
+    """
+    Return the channel's uploads playlist ID
+    - The ID never changes for a channel, so it is cached in an Airflow
+      Variable and channels.list is only called on a cache miss
+    """
+    cache_key = f"yt_uploads_{CHANNEL_ID}"
+    uploads_playlist = Variable.get(cache_key, default_var=None)
+    if uploads_playlist is not None:
+        return uploads_playlist
+    
+    # cache_discovery=False: skip the discovery file cache (and its warning) on cold starts
+    youtube = build("youtube", "v3", developerKey=API_KEY, cache_discovery=False)
+    response = youtube.channels().list(part="contentDetails", id=CHANNEL_ID).execute(num_retries=MAX_RETRIES)
     
     if not response["items"]:
         raise ValueError(f"❌ Channel not found: {CHANNEL_ID}")
     
-    channel_data = response["items"][0]
-    uploads_playlist = channel_data["contentDetails"]["relatedPlaylists"]["uploads"]
-    total_videos_in_channel = int(channel_data["statistics"]["videoCount"])
-    
-    logging.info(f"✅ Found uploads playlist: {uploads_playlist}")
-    logging.info(f"📊 Total videos in channel: {total_videos_in_channel}")
-    logging.info(f"🎯 Will extract ALL {total_videos_in_channel} videos...")
+    uploads_playlist = response["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
+    Variable.set(cache_key, uploads_playlist)
+    return uploads_playlist
 
-    # ==========================================
-    # 2️⃣ Collect ALL video IDs with pagination
-    # ==========================================
-    video_ids = set()  # Use set to prevent duplicates automatically!
-    next_page_token = None
-    page_count = 0
+
+def get_channel_videos(**context):
+    """
+    Extract ALL YouTube channel videos automatically
+    - Reads the uploads playlist ID from cache (channels.list only on first run)
+    - Handles pagination automatically (50 videos per page) until the last page
+    - Prevents duplicates using set()
+    - Batches API requests efficiently (videos.list pipelined with pagination)
+    """
     
-    # Loop until we have all videos from the channel
-    while len(video_ids) < total_videos_in_channel:
-        # Request next page of videos (max 50 per page)
-        request = youtube.playlistItems().list(
-            part="contentDetails",
-            playlistId=uploads_playlist,
-            maxResults=50,  # YouTube API max per request
-            pageToken=next_page_token
-        )
-        response = request.execute()
-        
-        # Add video IDs to set (duplicates automatically ignored)
-        new_ids = [item["contentDetails"]["videoId"] for item in response["items"]]
-        video_ids.update(new_ids)
-        
-        page_count += 1
-        logging.info(f"📄 Page {page_count}: Found {len(new_ids)} videos (Total: {len(video_ids)}/{total_videos_in_channel})")
-        
-        # Check if no more pages
-        next_page_token = response.get("nextPageToken")
-        if not next_page_token:
-            logging.info(f"✅ Reached end of playlist (no more pages)")
-            break
+    logging.info(f"🚀 Starting extraction for channel: {CHANNEL_HANDLE} (ID: {CHANNEL_ID})")
     
-    # Convert set to list
-    video_ids = list(video_ids)
-    logging.info(f"✅ Collected {len(video_ids)} unique video IDs from channel")
-
     # ==========================================
-    # 3️⃣ Get video details in batches of 50
+    # 1️⃣ Get uploads playlist (cached in an Airflow Variable)
     # ==========================================
-    videos = []
-    
-    for i in range(0, len(video_ids), 50):
-        batch_ids = video_ids[i:i+50]
-        batch_num = (i // 50) + 1
-        
-        logging.info(f"📦 Batch {batch_num}: Fetching details for {len(batch_ids)} videos...")
-        
-        request = youtube.videos().list(
-            part="snippet,contentDetails,statistics",
-            id=",".join(batch_ids)
-        )
-        videos_response = request.execute()
-        
-        # Extract video data
-        for video in videos_response["items"]:
-            duration = video["contentDetails"]["duration"]
-            videos.append({
-                "video_id": video["id"],
-                "title": video["snippet"]["title"],
-                "published_at": video["snippet"]["publishedAt"],
-                "duration": duration,
-                "duration_readable": iso_duration_to_readable(duration),
-                "view_count": video["statistics"].get("viewCount"),
-                "like_count": video["statistics"].get("likeCount"),
-                "comment_count": video["statistics"].get("commentCount"),
-            })
-    
-    logging.info(f"✅ Extracted details for {len(videos)} videos")
+    uploads_playlist = get_uploads_playlist_id()
+    logging.info(f"✅ Found uploads playlist: {uploads_playlist}")
 
     # ==========================================
-    # 4️⃣ Prepare output data
+    # 2️⃣ Prepare output file (NDJSON: header line + one line per video)
     # ==========================================
-    output = {
+    data_path = "/usr/local/airflow/include/youtube_data"
+    os.makedirs(data_path, exist_ok=True)
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = os.path.join(data_path, f"{CHANNEL_HANDLE}_{timestamp}.ndjson")
+    partial_filename = filename + ".part"  # Renamed once complete
+    
+    header = {
         "channel_handle": CHANNEL_HANDLE,
         "channel_id": CHANNEL_ID,
         "extraction_date": datetime.now().isoformat(),
-        "total_videos": len(videos),
-        "videos": videos
     }
 
     # ==========================================
-    # 5️⃣ Save to JSON file
+    # 3️⃣ Collect ALL video IDs with pagination
+    # 4️⃣ Get video details in batches of 50 (pipelined with pagination)
+    #    and stream each video to the file as it arrives
     # ==========================================
-    data_path = "/usr/local/airflow/include/youtube_data"
-    os.makedirs(data_path, exist_ok=True)
-    
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = os.path.join(data_path, f"{CHANNEL_HANDLE}_{timestamp}.json")
-    
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=4, ensure_ascii=False)
+    # orjson writes UTF-8 bytes directly (C encoder, much faster than json.dump)
+    # A failed attempt (API error, quota) removes its partial file before the retry
+    try:
+        with open(partial_filename, "wb") as f:
+            f.write(orjson.dumps(header) + b"\n")
+            video_count = asyncio.run(collect_channel_videos(uploads_playlist, f))
+        os.replace(partial_filename, filename)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(partial_filename)
+        raise
+
+    # Point latest.txt at the new file (atomic rename: readers never see a partial pointer)
+    pointer_tmp = filename + ".link"
+    try:
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(filename)
+        os.replace(pointer_tmp, os.path.join(data_path, "latest.txt"))
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(pointer_tmp)
+        raise
 
-    logging.info(f"✅ Saved {len(videos)} videos → {filename}")
+    logging.info(f"✅ Saved {video_count} videos → {filename}")
     
     # Push to XCom for downstream tasks
     context['task_instance'].xcom_push(key='json_filename', value=filename)
-    context['task_instance'].xcom_push(key='video_count', value=len(videos))
+    context['task_instance'].xcom_push(key='video_count', value=video_count)
     
     return filename
 
@@ -206,14 +273,14 @@ with DAG(
     - ID de la vidéo
     - Titre
     - Date de publication
-    - Durée (format ISO et lisible)
+    - Durée (format ISO, lisible et en secondes) + label short/long
     - Nombre de vues
     - Nombre de likes
     - Nombre de commentaires
     - URL de la miniature
     
     ## 📁 Fichiers de sortie
-    - Format: `MrBeast_YYYYMMDD_HHMMSS.json`
+    - Format: `MrBeast_YYYYMMDD_HHMMSS.ndjson` (en-tête + une ligne JSON par vidéo)
     - Emplacement: `/opt/airflow/include/youtube_data/`
     
     ## 📅 Planification
@@ -225,7 +292,8 @@ with DAG(
     - **Délai**: 5 minutes
     
     ## 📌 Notes
-    - Quota API YouTube: ~3 unités par exécution (avec 50 vidéos)
+    - Quota API YouTube: ~2 unités par tranche de 50 vidéos (playlist + videos),
+      +1 pour channel uniquement si la Variable `yt_uploads_<channel_id>` est absente
     - Limite quotidienne: 10,000 unités
     """,
     
@@ -247,11 +315,12 @@ with DAG(
         2. ✅ Récupère les vidéos de la chaîne MrBeast
         3. ✅ Extrait toutes les métadonnées importantes
         4. ✅ Nettoie et structure les données
-        5. ✅ Sauvegarde dans un fichier JSON horodaté
+        5. ✅ Sauvegarde dans un fichier NDJSON horodaté (écrit au fil de l'eau)
         
-        **Sortie**: Fichier JSON dans `include/youtube_data/`
+        **Sortie**: Fichier NDJSON dans `include/youtube_data/`
         
-        **Quota API utilisé**: ~3 unités (1 pour channel + 1 pour playlist + 1 pour videos)
+        **Quota API utilisé**: ~2 unités par tranche de 50 vidéos (1 pour playlist + 1 pour videos),
+        +1 pour channel au premier run seulement (ID de playlist mis en cache dans une Variable)
         """,
     )
     
@@ -302,8 +371,8 @@ with DAG(
 6️⃣ Voir les logs:
    Cliquer sur la tâche → Logs
 
-7️⃣ Vérifier le fichier JSON:
-   include/youtube_data/MrBeast_YYYYMMDD_HHMMSS.json
+7️⃣ Vérifier le fichier NDJSON:
+   include/youtube_data/MrBeast_YYYYMMDD_HHMMSS.ndjson
 
 8️⃣ Tester via CLI:
    astro dev bash
@@ -4,7 +4,7 @@
 DAG de chargement et transformation des données YouTube en PostgreSQL
 
 Fonctionnalités:
-1️⃣ Synchronisation JSON → Staging (UPSERT + DELETE)
+1️⃣ Synchronisation JSON → Staging (UPSERT parallèle par shard + DELETE)
 2️⃣ Transformation Staging → Core (avec analyse de durée)
 3️⃣ Déclenchement des contrôles qualité
 
@@ -20,11 +20,15 @@ produce_JSON → update_db → data_quality
 from airflow import DAG
 from airflow.operators.python import PythonOperator
 from airflow.operators.trigger_dagrun import TriggerDagRunOperator
+from airflow.providers.common.sql.hooks.sql import fetch_one_handler
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 from datetime import datetime, timedelta
-import json
+import csv
+import io
 import logging
+import orjson
 from pathlib import Path
+from include.sharding import shard_count, split_ndjson
 
 # ==========================================
 # 🔧 CONFIGURATION
@@ -32,133 +36,201 @@ from pathlib import Path
 DATA_PATH = "/usr/local/airflow/include/youtube_data"
 POSTGRES_CONN_ID = "postgres_dwh"
 
+# Colonnes chargées dans staging.youtube_videos_raw (ordre du COPY)
+STAGING_COLUMNS = """
+    video_id, title, published_at, duration, duration_readable,
+    duration_seconds, duration_label,
+    view_count, like_count, comment_count,
+    channel_id, channel_handle, extraction_date
+"""
+
 
 def find_latest_json(**context):
     """
-    🔍 Recherche du fichier JSON le plus récent
+    🔍 Recherche du fichier NDJSON le plus récent
+    
+    Lit le pointeur `latest.txt` écrit par produce_JSON (lecture O(1),
+    sans lister le répertoire ni faire de stat() par fichier).
     
     Returns:
-        str: Chemin absolu du fichier JSON le plus récent
+        str: Chemin absolu du fichier NDJSON le plus récent
     
     Raises:
-        FileNotFoundError: Si aucun fichier JSON n'est trouvé
+        FileNotFoundError: Si aucun fichier NDJSON n'est référencé
     """
-    json_files = list(Path(DATA_PATH).glob("*.json"))
-    if not json_files:
-        raise FileNotFoundError(f"❌ Aucun fichier JSON trouvé dans {DATA_PATH}")
+    pointer = Path(DATA_PATH, "latest.txt")
+    if not pointer.exists():
+        raise FileNotFoundError(f"❌ Aucun fichier NDJSON référencé dans {pointer}")
     
-    latest = max(json_files, key=lambda f: f.stat().st_mtime)
-    logging.info(f"✅ Fichier JSON sélectionné: {latest.name}")
+    latest = Path(pointer.read_text(encoding="utf-8").strip())
+    if not latest.exists():
+        raise FileNotFoundError(f"❌ Fichier NDJSON introuvable: {latest}")
+    logging.info(f"✅ Fichier NDJSON sélectionné: {latest.name}")
     
     context['ti'].xcom_push(key='json_file', value=str(latest))
     return str(latest)
 
 
-def sync_to_staging(**context):
+def shard_videos(**context):
     """
-    📥 Synchronisation JSON → Schéma Staging
+    🧩 Découpage du JSON en shards pour sync_to_staging
     
-    Opérations:
-    - UPSERT: Insertion de nouvelles vidéos, mise à jour des existantes
-    - DELETE: Suppression des vidéos absentes du JSON
-    - Dédoublonnage: Garantie d'unicité des video_ids
+    Le nombre de shards dépend du volume (shard_count: VIDEOS_PER_SHARD
+    par shard, au plus MAX_STAGING_SHARDS). Chaque shard est écrit dans son
+    propre fichier NDJSON (split_ndjson): seuls les chemins transitent par
+    XCom et chaque tâche mappée ne décode que ses propres vidéos.
     
     Returns:
-        int: Nombre de vidéos synchronisées
+        list[dict]: op_kwargs de chaque tâche sync_to_staging mappée
     """
-    # Récupération du fichier JSON
     json_file = context['ti'].xcom_pull(task_ids='find_latest_json', key='json_file')
     
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # NDJSON: en-tête puis une ligne par vidéo (comptage sans décoder les vidéos)
+    with open(json_file, 'rb') as f:
+        header = orjson.loads(f.readline())
+        video_count = sum(1 for line in f if line.strip())
     
-    videos = data['videos']
-    channel_id = data['channel_id']
-    channel_handle = data['channel_handle']
-    extraction_date = data['extraction_date']
+    num_shards = shard_count(video_count)
+    shard_files = split_ndjson(json_file, num_shards)
+    logging.info(f"🧩 {video_count} vidéos réparties sur {num_shards} shard(s)")
     
-    # Dédoublonnage dans le JSON
-    unique_videos = {v['video_id']: v for v in videos}
-    videos = list(unique_videos.values())
+    # Passer les données aux tâches suivantes
+    context['ti'].xcom_push(key='extraction_date', value=header['extraction_date'])
+    return [{'shard_file': shard_file} for shard_file in shard_files]
+
+
+def sync_to_staging(shard_file, **context):
+    """
+    📥 Synchronisation JSON → Schéma Staging (un shard)
+    
+    Opérations:
+    - COPY: Chargement en masse du shard dans une table temporaire
+    - UPSERT: Insertion de nouvelles vidéos, mise à jour des existantes
     
-    logging.info(f"📊 {len(videos)} vidéos uniques extraites du JSON")
+    Les video_ids sont déjà uniques (dédoublonnés à l'extraction).
+    Chaque video_id appartient à un seul fichier de shard: les UPSERT parallèles
+    ne se chevauchent jamais. La suppression des vidéos obsolètes est
+    faite une seule fois par prune_staging.
+    
+    Returns:
+        int: Nombre de vidéos synchronisées pour ce shard
+    """
+    # Tampon CSV dans l'ordre des colonnes (statistiques déjà typées en int à l'extraction)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    video_count = 0
+    
+    # Lecture ligne à ligne: aucune liste complète de vidéos en mémoire
+    with open(shard_file, 'rb') as f:
+        header = orjson.loads(f.readline())
+        channel_id = header['channel_id']
+        channel_handle = header['channel_handle']
+        extraction_date = header['extraction_date']
+        
+        for line in f:
+            if not line.strip():
+                continue
+            v = orjson.loads(line)
+            video_count += 1
+            writer.writerow((
+                v['video_id'], v['title'], v['published_at'], v['duration'], v['duration_readable'],
+                v['duration_seconds'], v['duration_label'],
+                v['view_count'], v['like_count'], v['comment_count'],
+                channel_id, channel_handle, extraction_date,
+            ))
+    buffer.seek(0)
+    
+    logging.info(f"📊 {Path(shard_file).name}: {video_count} vidéos")
     
     # Connexion à PostgreSQL
     pg_hook = PostgresHook(postgres_conn_id=POSTGRES_CONN_ID)
+    conn = pg_hook.get_conn()
     
-    # Récupération des IDs existants en staging
-    existing_ids = set()
+    # Une connexion, une transaction: COPY + UPSERT atomiques
     try:
-        result = pg_hook.get_records("SELECT video_id FROM staging.youtube_videos_raw")
-        existing_ids = {row[0] for row in result}
-        logging.info(f"📂 {len(existing_ids)} vidéos déjà en staging")
-    except Exception as e:
-        logging.warning(f"⚠️ Impossible de récupérer les IDs existants: {e}")
+        with conn.cursor() as cur:
+            # ==========================================
+            # COPY: Chargement en masse dans une table temporaire
+            # ==========================================
+            # Les tables temporaires ne sont pas journalisées (pas de WAL)
+            cur.execute(f"""
+                CREATE TEMP TABLE tmp_videos ON COMMIT DROP AS
+                SELECT {STAGING_COLUMNS} FROM staging.youtube_videos_raw
+                WITH NO DATA
+            """)
+            cur.copy_expert(
+                f"COPY tmp_videos ({STAGING_COLUMNS}) FROM STDIN WITH (FORMAT CSV)",
+                buffer,
+            )
+            
+            # ==========================================
+            # UPSERT: Insertion et mise à jour (ensembliste)
+            # ==========================================
+            # xmax = 0 ⇔ ligne insérée (sinon mise à jour): compteurs sans relire la table
+            cur.execute(f"""
+                WITH upserted AS (
+                    INSERT INTO staging.youtube_videos_raw ({STAGING_COLUMNS})
+                    SELECT {STAGING_COLUMNS} FROM tmp_videos
+                    ON CONFLICT (video_id) DO UPDATE SET
+                        title = EXCLUDED.title,
+                        duration = EXCLUDED.duration,
+                        duration_readable = EXCLUDED.duration_readable,
+                        duration_seconds = EXCLUDED.duration_seconds,
+                        duration_label = EXCLUDED.duration_label,
+                        view_count = EXCLUDED.view_count,
+                        like_count = EXCLUDED.like_count,
+                        comment_count = EXCLUDED.comment_count,
+                        extraction_date = EXCLUDED.extraction_date
+                    RETURNING (xmax = 0) AS inserted
+                )
+                SELECT
+                    COUNT(*) FILTER (WHERE inserted),
+                    COUNT(*) FILTER (WHERE NOT inserted)
+                FROM upserted
+            """)
+            inserted, updated = cur.fetchone()
+            logging.info(f"✅ Insertions: {inserted} | Mises à jour: {updated}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    return video_count
+
+
+def prune_staging(**context):
+    """
+    🗑️ Suppression des vidéos absentes du dernier JSON
     
-    json_video_ids = {v['video_id'] for v in videos}
+    Tous les shards ont estampillé leurs lignes avec la date d'extraction
+    courante: les lignes plus anciennes ne figurent plus dans le JSON.
+    Les fichiers de shard, désormais chargés, sont supprimés.
     
-    # ==========================================
-    # UPSERT: Insertion et mise à jour
-    # ==========================================
-    upsert_query = """
-        INSERT INTO staging.youtube_videos_raw (
-            video_id, title, published_at, duration, duration_readable,
-            view_count, like_count, comment_count,
-            channel_id, channel_handle, extraction_date
-        ) VALUES (
-            %(video_id)s, %(title)s, %(published_at)s, %(duration)s, %(duration_readable)s,
-            %(view_count)s, %(like_count)s, %(comment_count)s,
-            %(channel_id)s, %(channel_handle)s, %(extraction_date)s
-        )
-        ON CONFLICT (video_id) DO UPDATE SET
-            title = EXCLUDED.title,
-            view_count = EXCLUDED.view_count,
-            like_count = EXCLUDED.like_count,
-            comment_count = EXCLUDED.comment_count,
-            extraction_date = EXCLUDED.extraction_date
+    Returns:
+        int: Nombre de vidéos supprimées de staging
     """
+    extraction_date = context['ti'].xcom_pull(task_ids='shard_videos', key='extraction_date')
+    pg_hook = PostgresHook(postgres_conn_id=POSTGRES_CONN_ID)
     
-    inserted = updated = 0
-    for video in videos:
-        # Gestion des valeurs None pour les statistiques
-        view_count = video.get('view_count')
-        like_count = video.get('like_count')
-        comment_count = video.get('comment_count')
-        
-        pg_hook.run(upsert_query, parameters={
-            'video_id': video['video_id'],
-            'title': video['title'],
-            'published_at': video['published_at'],
-            'duration': video['duration'],
-            'duration_readable': video['duration_readable'],
-            'view_count': int(view_count) if view_count is not None else 0,
-            'like_count': int(like_count) if like_count is not None else 0,
-            'comment_count': int(comment_count) if comment_count is not None else 0,
-            'channel_id': channel_id,
-            'channel_handle': channel_handle,
-            'extraction_date': extraction_date,
-        })
-        if video['video_id'] in existing_ids:
-            updated += 1
-        else:
-            inserted += 1
-    
-    logging.info(f"✅ Insertions: {inserted} | Mises à jour: {updated}")
-    
-    # ==========================================
-    # DELETE: Suppression des vidéos obsolètes
-    # ==========================================
-    to_delete = existing_ids - json_video_ids
-    if to_delete:
-        pg_hook.run(
-            "DELETE FROM staging.youtube_videos_raw WHERE video_id = ANY(%(ids)s)",
-            parameters={'ids': list(to_delete)}
+    # run() (et non get_first()) pour que le DELETE soit commité
+    deleted = pg_hook.run("""
+        WITH deleted AS (
+            DELETE FROM staging.youtube_videos_raw
+            WHERE extraction_date <> %(date)s::timestamp
+            RETURNING 1
         )
-        logging.info(f"🗑️ Supprimées: {len(to_delete)} vidéos obsolètes")
+        SELECT COUNT(*) FROM deleted
+    """, parameters={'date': extraction_date}, handler=fetch_one_handler)[0]
+    
+    if deleted:
+        logging.info(f"🗑️ Supprimées: {deleted} vidéos obsolètes")
     
-    # Passer les données à la tâche suivante
-    context['ti'].xcom_push(key='extraction_date', value=extraction_date)
-    return len(videos)
+    # Tous les shards sont chargés: fichiers intermédiaires inutiles
+    for shard in context['ti'].xcom_pull(task_ids='shard_videos'):
+        Path(shard['shard_file']).unlink(missing_ok=True)
+    return deleted
 
 
 def transform_to_core(**context):
@@ -166,109 +238,113 @@ def transform_to_core(**context):
     🔄 Transformation Staging → Core Tables
     
     Transformations appliquées:
-    - Conversion ISO 8601 (PT22M26S) → PostgreSQL INTERVAL
-    - Labellisation: 'short' (<1 min) ou 'long' (≥1 min)
+    - Durée en secondes (INTEGER, calculée à l'extraction)
+    - Labellisation 'short' (<1 min) / 'long' (≥1 min), calculée à l'extraction
     - Gestion de l'historique: created_at, updated_at
     
     Tables cibles:
     - core.videos: Métadonnées enrichies des vidéos
-    - core.video_statistics: Historique des statistiques
+    - core.video_statistics: Historique des statistiques (partitions mensuelles)
     
     Returns:
         int: Nombre de vidéos transformées
     """
-    extraction_date = context['ti'].xcom_pull(task_ids='sync_to_staging', key='extraction_date')
+    extraction_date = context['ti'].xcom_pull(task_ids='shard_videos', key='extraction_date')
     pg_hook = PostgresHook(postgres_conn_id=POSTGRES_CONN_ID)
+    conn = pg_hook.get_conn()
     
     logging.info("🔄 Début de la transformation staging → core...")
     
-    # ==========================================
-    # UPSERT dans core.videos avec transformations
-    # ==========================================
-    pg_hook.run("""
-        WITH duration_calc AS (
-            SELECT 
-                video_id,
-                title,
-                published_at,
-                duration,
-                duration_readable,
-                channel_id,
-                channel_handle,
-                -- Conversion ISO 8601 (PT22M26S) → INTERVAL PostgreSQL
-                duration::INTERVAL AS duration_seconds,
-                -- Calcul des secondes totales pour labellisation
-                EXTRACT(EPOCH FROM duration::interval) AS total_seconds
-            FROM staging.youtube_videos_raw
-        )
-        INSERT INTO core.videos (
-            video_id, title, published_at, duration, duration_readable,
-            duration_seconds, duration_label,
-            channel_id, channel_handle, created_at, updated_at
-        )
-        SELECT DISTINCT 
-            video_id,
-            title,
-            published_at,
-            duration,
-            duration_readable,
-            duration_seconds,
-            CASE 
-                WHEN total_seconds < 60 THEN 'short'
-                ELSE 'long'
-            END AS duration_label,
-            channel_id,
-            channel_handle,
-            NOW(),
-            NOW()
-        FROM duration_calc
-        ON CONFLICT (video_id) DO UPDATE SET
-            title = EXCLUDED.title,
-            duration_seconds = EXCLUDED.duration_seconds,
-            duration_label = EXCLUDED.duration_label,
-            updated_at = NOW()
-    """)
-    
-    logging.info("✅ Table core.videos mise à jour")
-    
-    # ==========================================
-    # DELETE: Suppression des vidéos absentes de staging
-    # ==========================================
-    # First, count how many will be deleted
-    to_delete_core = pg_hook.get_first("""
-        SELECT COUNT(*) FROM core.videos
-        WHERE video_id NOT IN (
-            SELECT video_id FROM staging.youtube_videos_raw
-        )
-    """)[0]
-    
-    # Then delete them
-    if to_delete_core > 0:
-        pg_hook.run("""
-            DELETE FROM core.videos
-            WHERE video_id NOT IN (
-                SELECT video_id FROM staging.youtube_videos_raw
+    # Une connexion, une transaction: core reste cohérent en cas d'échec
+    try:
+        with conn.cursor() as cur:
+            # ==========================================
+            # UPSERT dans core.videos avec transformations
+            # ==========================================
+            # Durée et label déjà calculés à l'extraction → simple copie
+            cur.execute("""
+                INSERT INTO core.videos (
+                    video_id, title, published_at, duration, duration_readable,
+                    duration_seconds, duration_label,
+                    channel_id, channel_handle, created_at, updated_at
+                )
+                SELECT
+                    video_id,
+                    title,
+                    published_at,
+                    duration,
+                    duration_readable,
+                    duration_seconds,
+                    duration_label,
+                    channel_id,
+                    channel_handle,
+                    NOW(),
+                    NOW()
+                FROM staging.youtube_videos_raw
+                ON CONFLICT (video_id) DO UPDATE SET
+                    title = EXCLUDED.title,
+                    duration = EXCLUDED.duration,
+                    duration_readable = EXCLUDED.duration_readable,
+                    duration_seconds = EXCLUDED.duration_seconds,
+                    duration_label = EXCLUDED.duration_label,
+                    updated_at = NOW()
+            """)
+            
+            logging.info("✅ Table core.videos mise à jour")
+            
+            # ==========================================
+            # DELETE: Suppression des vidéos absentes de staging
+            # ==========================================
+            # Anti-jointure NOT EXISTS + comptage via RETURNING (un seul parcours)
+            cur.execute("""
+                WITH deleted AS (
+                    DELETE FROM core.videos c
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM staging.youtube_videos_raw s
+                        WHERE s.video_id = c.video_id
+                    )
+                    RETURNING 1
+                )
+                SELECT COUNT(*) FROM deleted
+            """)
+            to_delete_core = cur.fetchone()[0]
+            
+            if to_delete_core > 0:
+                logging.info(f"🗑️ Supprimées de core.videos: {to_delete_core} vidéos absentes de staging")
+            else:
+                logging.info("✅ Aucune vidéo à supprimer de core.videos")
+            
+            # ==========================================
+            # INSERT dans core.video_statistics (historique)
+            # ==========================================
+            # Partition mensuelle créée au besoin (PG y route ensuite les lignes)
+            cur.execute(
+                "SELECT core.ensure_statistics_partition(%(date)s::timestamp)",
+                {'date': extraction_date},
             )
-        """)
-        logging.info(f"🗑️ Supprimées de core.videos: {to_delete_core} vidéos absentes de staging")
-    else:
-        logging.info("✅ Aucune vidéo à supprimer de core.videos")
+            
+            # Seul le dernier lot extrait est relu (index idx_staging_extraction)
+            cur.execute("""
+                INSERT INTO core.video_statistics (
+                    video_id, view_count, like_count, comment_count, recorded_at
+                )
+                SELECT video_id, view_count, like_count, comment_count, extraction_date
+                FROM staging.youtube_videos_raw
+                WHERE extraction_date = %(date)s::timestamp
+            """, {'date': extraction_date})
+            
+            logging.info("✅ Table core.video_statistics mise à jour")
+            
+            # Comptage final
+            cur.execute("SELECT COUNT(*) FROM core.videos")
+            count = cur.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
     
-    # ==========================================
-    # INSERT dans core.video_statistics (historique)
-    # ==========================================
-    pg_hook.run("""
-        INSERT INTO core.video_statistics (
-            video_id, view_count, like_count, comment_count, recorded_at
-        )
-        SELECT video_id, view_count, like_count, comment_count, %(date)s::timestamp
-        FROM staging.youtube_videos_raw
-    """, parameters={'date': extraction_date})
-    
-    logging.info("✅ Table core.video_statistics mise à jour")
-    
-    # Comptage final
-    count = pg_hook.get_first("SELECT COUNT(*) FROM core.videos")[0]
     logging.info(f"✅ Transformation terminée: {count} vidéos dans core.videos")
     return count
 
@@ -302,18 +378,37 @@ with DAG(
         python_callable=find_latest_json,
         doc_md="""
         ### Recherche du fichier JSON
-        Identifie le fichier JSON le plus récent dans `/include/youtube_data/`
+        Lit le pointeur `/include/youtube_data/latest.txt` vers le fichier le plus récent
+        """,
+    )
+    
+    shard = PythonOperator(
+        task_id="shard_videos",
+        python_callable=shard_videos,
+        doc_md="""
+        ### Découpage en shards
+        Calcule le nombre de shards (selon le volume) et écrit un fichier NDJSON par shard
+        pour paralléliser le chargement
         """,
     )
     
-    sync_staging = PythonOperator(
+    sync_staging = PythonOperator.partial(
         task_id="sync_to_staging",
         python_callable=sync_to_staging,
         doc_md="""
-        ### Synchronisation vers Staging
-        - UPSERT: Insertion/mise à jour des vidéos
-        - DELETE: Suppression des vidéos obsolètes
-        - Garantie d'unicité des video_ids
+        ### Synchronisation vers Staging (une tâche par shard)
+        - COPY + UPSERT: Insertion/mise à jour des vidéos du shard
+        - video_ids déjà uniques (dédoublonnés à l'extraction)
+        """,
+    ).expand(op_kwargs=shard.output)
+    
+    prune = PythonOperator(
+        task_id="prune_staging",
+        python_callable=prune_staging,
+        doc_md="""
+        ### Nettoyage de Staging
+        - DELETE: Suppression des vidéos absentes du dernier JSON
+        - Suppression des fichiers de shard
         """,
     )
     
@@ -322,7 +417,7 @@ with DAG(
         python_callable=transform_to_core,
         doc_md="""
         ### Transformation vers Core
-        - Conversion ISO 8601 → PostgreSQL INTERVAL
+        - Durée en secondes (INTEGER, calculée à l'extraction)
         - Labellisation: 'short' (<1 min) / 'long' (≥1 min)
         - Historique des statistiques
         """,
@@ -341,4 +436,4 @@ with DAG(
     # ==========================================
     # 🔗 WORKFLOW
     # ==========================================
-    find_json >> sync_staging >> transform >> trigger_quality
+    find_json >> shard >> sync_staging >> prune >> transform >> trigger_quality
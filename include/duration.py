@@ -0,0 +1,85 @@
+"""
+⏱️ ISO 8601 Duration Helpers
+=============================
+Shared by the DAGs and the test suite so the conversion lives in one place.
+
+YouTube returns video durations as ISO 8601 strings such as ``PT37M4S``,
+``PT1H23M45S`` or ``P1DT2H`` (live streams longer than a day).
+"""
+
+import re
+from functools import lru_cache
+
+# Videos strictly shorter than this are labelled 'short'
+SHORT_VIDEO_MAX_SECONDS = 60
+
+# Full YouTube duration grammar in one pattern: P[nD][T[nH][nM][nS]]
+_ISO_RE = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?")
+
+
+# "00".."59": minutes and seconds fields are always in this range once split
+_PAD2 = tuple(f"{i:02d}" for i in range(60))
+
+# Time components of the common "PT..." form, in the order they must appear
+_PT_UNITS = (("H", 3600), ("M", 60), ("S", 1))
+
+
+def _pt_to_seconds(duration):
+    """Hand-parse the "PT[nH][nM][nS]" form (None if malformed)"""
+    total_seconds = 0
+    rest = duration[2:]
+    for unit, factor in _PT_UNITS:
+        value, found, tail = rest.partition(unit)
+        if found:
+            if not value.isdecimal():
+                return None
+            total_seconds += int(value) * factor
+            rest = tail
+    return None if rest else total_seconds
+
+
+@lru_cache(maxsize=4096)
+def iso_to_seconds(duration):
+    """Convert ISO 8601 duration to total seconds (0 if invalid)
+
+    Nearly every video is "PT[nH][nM][nS]": those are split by hand, without
+    the regex engine. Day-long durations go through the full pattern, whose
+    groups that did not participate default to 0. Results are plain ints,
+    memoized: channels repeat the same short durations (PT58S, PT15S...).
+    """
+    if not isinstance(duration, str):
+        return 0
+    if duration.startswith("PT"):
+        total_seconds = _pt_to_seconds(duration)
+        return 0 if total_seconds is None else total_seconds
+    match = _ISO_RE.fullmatch(duration)
+    if match is None:
+        return 0  # Unsupported unit (Y, W, months) or malformed string
+    days, hours, minutes, seconds = match.groups(0)
+    return ((int(days) * 24 + int(hours)) * 60 + int(minutes)) * 60 + int(seconds)
+
+
+def seconds_to_readable(total_seconds):
+    """Format seconds as H:MM:SS (with hours) or M:SS
+
+    Plain integer ops (no divmod tuples); sub-hour durations (most videos)
+    return before the hours split. Zero-padded fields come from _PAD2
+    instead of going through the format-spec machinery.
+    """
+    minutes = total_seconds // 60
+    seconds = total_seconds - minutes * 60
+    if minutes < 60:
+        return f"{minutes}:{_PAD2[seconds]}"
+    hours = minutes // 60
+    minutes -= hours * 60
+    return f"{hours}:{_PAD2[minutes]}:{_PAD2[seconds]}"
+
+
+def iso_duration_to_readable(duration):
+    """Convert ISO 8601 duration to readable format (HH:MM:SS or MM:SS)"""
+    return seconds_to_readable(iso_to_seconds(duration))
+
+
+def duration_label(total_seconds):
+    """Label a video 'short' (< 1 min) or 'long' (>= 1 min)"""
+    return "short" if total_seconds < SHORT_VIDEO_MAX_SECONDS else "long"
@@ -0,0 +1,50 @@
+"""
+🧩 Staging Shard Helpers
+=========================
+Shared by the update_db DAG and the test suite so the shard assignment lives in one place.
+
+sync_to_staging is mapped once per shard: every video_id must land in exactly one
+shard, and in the same one whichever worker process computes it.
+"""
+
+import contextlib
+import zlib
+
+import orjson
+
+# Parallelism of sync_to_staging (dynamic task mapping)
+VIDEOS_PER_SHARD = 250
+MAX_STAGING_SHARDS = 4
+
+
+def shard_count(video_count):
+    """Number of shards for a file of video_count videos (1 to MAX_STAGING_SHARDS)"""
+    return max(1, min(MAX_STAGING_SHARDS, -(-video_count // VIDEOS_PER_SHARD)))
+
+
+def shard_of(video_id, num_shards):
+    """Stable shard of a video (crc32: same in every process, unlike the salted hash())"""
+    return zlib.crc32(video_id.encode("utf-8")) % num_shards
+
+
+def split_ndjson(json_file, num_shards):
+    """
+    Write one NDJSON file per shard (same header line + that shard's videos)
+
+    Each video line is decoded once here, so every mapped sync_to_staging task
+    only decodes its own rows. Returns the shard file paths, in shard order.
+    """
+    # .shard<n> suffix: shard files are never picked up as *.ndjson extractions
+    paths = [f"{json_file}.shard{shard}" for shard in range(num_shards)]
+    with open(json_file, "rb") as src, contextlib.ExitStack() as stack:
+        outs = [stack.enter_context(open(path, "wb")) for path in paths]
+        header = src.readline()
+        for out in outs:
+            out.write(header)
+        for line in src:
+            if not line.strip():
+                continue
+            if not line.endswith(b"\n"):
+                line += b"\n"
+            outs[shard_of(orjson.loads(line)["video_id"], num_shards)].write(line)
+    return paths
@@ -22,6 +22,8 @@ CREATE TABLE IF NOT EXISTS staging.youtube_videos_raw (
     published_at TIMESTAMP,
     duration VARCHAR(50),  -- ISO 8601 format (e.g., PT37M4S)
     duration_readable VARCHAR(20),  -- Human readable (e.g., 37:04)
+    duration_seconds INTEGER,  -- Total seconds, parsed at extraction
+    duration_label VARCHAR(10),  -- 'short' (<1 min) or 'long' (>=1 min)
     view_count BIGINT,
     like_count BIGINT,
     comment_count BIGINT,
@@ -31,6 +33,10 @@ CREATE TABLE IF NOT EXISTS staging.youtube_videos_raw (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Columns added after the initial release (no-op on fresh databases)
+ALTER TABLE staging.youtube_videos_raw ADD COLUMN IF NOT EXISTS duration_seconds INTEGER;
+ALTER TABLE staging.youtube_videos_raw ADD COLUMN IF NOT EXISTS duration_label VARCHAR(10);
+
 -- Index for faster queries on staging
 CREATE INDEX IF NOT EXISTS idx_staging_video_id ON staging.youtube_videos_raw(video_id);
 CREATE INDEX IF NOT EXISTS idx_staging_extraction ON staging.youtube_videos_raw(extraction_date);
@@ -47,7 +53,7 @@ CREATE TABLE IF NOT EXISTS core.videos (
     published_at TIMESTAMP NOT NULL,
     duration VARCHAR(50),  -- ISO 8601 format
     duration_readable VARCHAR(20),  -- Human readable
-    duration_seconds INTERVAL,  -- Duration as interval (for calculations)
+    duration_seconds INTEGER,  -- Total seconds (parsed at extraction)
     duration_label VARCHAR(10),  -- 'short' (<1 min) or 'long' (>=1 min)
     channel_id VARCHAR(50) NOT NULL,
     channel_handle VARCHAR(100),
@@ -55,24 +61,100 @@ CREATE TABLE IF NOT EXISTS core.videos (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- One-time migration: duration_seconds used to be an INTERVAL
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'core' AND table_name = 'videos'
+          AND column_name = 'duration_seconds' AND data_type = 'interval'
+    ) THEN
+        ALTER TABLE core.videos
+            ALTER COLUMN duration_seconds TYPE INTEGER
+            USING EXTRACT(EPOCH FROM duration_seconds)::INTEGER;
+    END IF;
+END $$;
+
 -- Table 2: Video Statistics (Fact Table)
 -- Stores time-series statistics for each video
 -- This allows tracking how views/likes/comments change over time
+-- Range-partitioned by month on recorded_at: the daily append only touches
+-- the current month's partition, and history queries prune old months
+
+-- One-time migration: the table used to be a plain (non-partitioned) table.
+-- Move it aside here; its rows are copied into the partitions below.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'core' AND c.relname = 'video_statistics' AND c.relkind = 'r'
+    ) THEN
+        ALTER TABLE core.video_statistics RENAME TO video_statistics_legacy;
+    END IF;
+END $$;
+
 CREATE TABLE IF NOT EXISTS core.video_statistics (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     video_id VARCHAR(50) NOT NULL,
     view_count BIGINT DEFAULT 0,
     like_count BIGINT DEFAULT 0,
     comment_count BIGINT DEFAULT 0,
-    recorded_at TIMESTAMP NOT NULL,  -- When these stats were recorded
+    recorded_at TIMESTAMP NOT NULL,  -- When these stats were recorded (partition key)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    -- The partition key must be part of the primary key
+    PRIMARY KEY (id, recorded_at),
+    
     -- Foreign key constraint
     CONSTRAINT fk_video 
         FOREIGN KEY (video_id) 
         REFERENCES core.videos(video_id) 
         ON DELETE CASCADE
-);
+) PARTITION BY RANGE (recorded_at);
+
+-- Creates the monthly partition holding `ts` if it does not exist yet
+-- (called by update_db before each statistics insert)
+CREATE OR REPLACE FUNCTION core.ensure_statistics_partition(ts TIMESTAMP)
+RETURNS VOID AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', ts);
+    partition_name TEXT := 'video_statistics_' || to_char(ts, 'YYYYMM');
+BEGIN
+    IF to_regclass('core.' || partition_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE core.%I PARTITION OF core.video_statistics FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, month_start + INTERVAL '1 month'
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One-time migration (continued): copy the legacy rows, then drop the old table
+DO $$
+DECLARE
+    legacy_month TIMESTAMP;
+BEGIN
+    IF to_regclass('core.video_statistics_legacy') IS NOT NULL THEN
+        FOR legacy_month IN
+            SELECT DISTINCT date_trunc('month', recorded_at) FROM core.video_statistics_legacy
+        LOOP
+            PERFORM core.ensure_statistics_partition(legacy_month);
+        END LOOP;
+        
+        INSERT INTO core.video_statistics (
+            video_id, view_count, like_count, comment_count, recorded_at, created_at
+        )
+        SELECT video_id, view_count, like_count, comment_count, recorded_at, created_at
+        FROM core.video_statistics_legacy;
+        
+        -- CASCADE: the views below are recreated on the new table
+        DROP TABLE core.video_statistics_legacy CASCADE;
+    END IF;
+END $$;
+
+-- Current month, so the first load does not have to create it
+SELECT core.ensure_statistics_partition(CURRENT_TIMESTAMP::timestamp);
 
 -- ==========================================
 -- 📊 INDEXES for Performance
@@ -82,9 +164,10 @@ CREATE TABLE IF NOT EXISTS core.video_statistics (
 CREATE INDEX IF NOT EXISTS idx_videos_channel ON core.videos(channel_id);
 CREATE INDEX IF NOT EXISTS idx_videos_published ON core.videos(published_at);
 
--- Indexes on core.video_statistics
-CREATE INDEX IF NOT EXISTS idx_stats_video ON core.video_statistics(video_id);
-CREATE INDEX IF NOT EXISTS idx_stats_recorded ON core.video_statistics(recorded_at);
+-- Indexes on core.video_statistics (created on every partition)
+-- video_id lookups use the leading column of idx_stats_video_recorded.
+-- recorded_at only grows, so a BRIN index is a fraction of a B-tree's size.
+CREATE INDEX IF NOT EXISTS idx_stats_recorded ON core.video_statistics USING BRIN (recorded_at);
 CREATE INDEX IF NOT EXISTS idx_stats_video_recorded ON core.video_statistics(video_id, recorded_at);
 
 -- ==========================================
@@ -134,6 +217,6 @@ DO $$
 BEGIN
     RAISE NOTICE '✅ Schemas created successfully!';
     RAISE NOTICE '📊 Staging schema: staging.youtube_videos_raw';
-    RAISE NOTICE '🏢 Core schema: core.videos + core.video_statistics';
+    RAISE NOTICE '🏢 Core schema: core.videos + core.video_statistics (monthly partitions)';
     RAISE NOTICE '📈 Views: core.videos_latest_stats + core.video_stats_history';
 END $$;
@@ -32,7 +32,7 @@ function Show-Help {
     
     Write-Host "Actions:" -ForegroundColor Yellow
     Write-Host "  logs           - Copy Airflow logs from container to host" -ForegroundColor White
-    Write-Host "  json           - Copy JSON data files from container to host" -ForegroundColor White
+    Write-Host "  json           - Copy NDJSON data files from container to host" -ForegroundColor White
     Write-Host "  reports        - Copy Soda quality reports from container to host" -ForegroundColor White
     Write-Host "  to-container   - Copy file/folder from host to container" -ForegroundColor White
     Write-Host "  from-container - Copy file/folder from container to host" -ForegroundColor White
@@ -41,7 +41,7 @@ function Show-Help {
     Write-Host "  .\scripts\copy_data.ps1 logs" -ForegroundColor Cyan
     Write-Host "  .\scripts\copy_data.ps1 json" -ForegroundColor Cyan
     Write-Host "  .\scripts\copy_data.ps1 reports" -ForegroundColor Cyan
-    Write-Host "  .\scripts\copy_data.ps1 to-container include/youtube_data/MrBeast.json" -ForegroundColor Cyan
+    Write-Host "  .\scripts\copy_data.ps1 to-container include/youtube_data/MrBeast_20251002_143000.ndjson" -ForegroundColor Cyan
     Write-Host "  .\scripts\copy_data.ps1 from-container /usr/local/airflow/logs" -ForegroundColor Cyan
     Write-Host "`n============================================`n" -ForegroundColor Cyan
 }
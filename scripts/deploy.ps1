@@ -61,8 +61,8 @@ function Show-Status {
     
     Write-Host "`n📂 Data Directories:" -ForegroundColor Yellow
     if (Test-Path "include/youtube_data") {
-        $jsonCount = (Get-ChildItem "include/youtube_data" -Filter "*.json" | Measure-Object).Count
-        Write-Host "   JSON files:  $jsonCount files" -ForegroundColor Cyan
+        $jsonCount = (Get-ChildItem "include/youtube_data" -Filter "*.ndjson" | Measure-Object).Count
+        Write-Host "   NDJSON files: $jsonCount files" -ForegroundColor Cyan
     }
     if (Test-Path "include/soda/reports") {
         $reportCount = (Get-ChildItem "include/soda/reports" -Filter "*.json" | Measure-Object).Count
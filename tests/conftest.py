@@ -4,9 +4,49 @@ Simple test helpers for YouTube ELT Pipeline
 """
 
 import pytest
+import json
+import mmap
 import os
+import re
+import sys
+import pandas as pd
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
+
+# Make the Airflow project root importable (shared helpers live in include/)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+DAG_FILES = ("dags/youtube_extract.py", "dags/youtube_load_db.py", "dags/youtube_data_quality.py")
+
+# Strings the DAG validation tests look for (both quote styles where it matters)
+DAG_TOKENS = (
+    'dag_id', 'produce_JSON', 'update_db', 'data_quality', 'TriggerDagRunOperator',
+    'find_latest_json', 'sync_to_staging', 'transform_to_core', 'trigger_data_quality',
+    'run_soda_scan', 'run_soda',
+    'task_id="extract_youtube_videos"', "task_id='extract_youtube_videos'",
+    'trigger_dag_id="update_db"', "trigger_dag_id='update_db'",
+    'trigger_dag_id="data_quality"', "trigger_dag_id='data_quality'",
+)
+# One alternation (longest first) in a lookahead: a single pass finds every
+# occurrence, including tokens nested inside others (data_quality in trigger_data_quality)
+# (bytes pattern: the DAG files are scanned as mmaps, without decoding them)
+_DAG_TOKENS_RE = re.compile(
+    b"(?=(" + b"|".join(re.escape(t.encode()) for t in sorted(DAG_TOKENS, key=len, reverse=True)) + b"))"
+)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(items):
+    """Group integration tests on one xdist worker (--dist=loadgroup) so they share session fixtures
+
+    tryfirst: xdist turns the xdist_group marker into the @group nodeid suffix in its own
+    pytest_collection_modifyitems, which must see the marker added here
+    """
+    for item in items:
+        if item.get_closest_marker("integration"):
+            item.add_marker(pytest.mark.xdist_group(name="integration"))
 
 
 # ==========================================
@@ -29,14 +69,15 @@ def sample_video_data():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_json_output():
-    """Sample complete JSON output from produce_JSON DAG"""
+    """Sample produce_JSON output: NDJSON header + parse_video records (shared: do not mutate)"""
     return {
-        "channel_handle": "MrBeast",
-        "channel_id": "UCX6OQ3DkcsbYNE6H8uQQuVA",
-        "extraction_date": "2025-10-02T14:30:00.123456",
-        "total_videos": 2,
+        "header": {
+            "channel_handle": "MrBeast",
+            "channel_id": "UCX6OQ3DkcsbYNE6H8uQQuVA",
+            "extraction_date": "2025-10-02T14:30:00.123456",
+        },
         "videos": [
             {
                 "video_id": "4l97aNza_Zc",
@@ -44,9 +85,11 @@ def sample_json_output():
                 "published_at": "2025-09-13T16:00:01Z",
                 "duration": "PT37M4S",
                 "duration_readable": "37:04",
-                "view_count": "54506132",
-                "like_count": "1833636",
-                "comment_count": "27466"
+                "duration_seconds": 2224,
+                "duration_label": "long",
+                "view_count": 54506132,
+                "like_count": 1833636,
+                "comment_count": 27466
             },
             {
                 "video_id": "3ih2bPKSWsQ",
@@ -54,26 +97,41 @@ def sample_json_output():
                 "published_at": "2025-09-12T17:00:01Z",
                 "duration": "PT35S",
                 "duration_readable": "0:35",
-                "view_count": "30850222",
-                "like_count": "1058130",
-                "comment_count": "3265"
+                "duration_seconds": 35,
+                "duration_label": "short",
+                "view_count": 30850222,
+                "like_count": 1058130,
+                "comment_count": 3265
             }
         ]
     }
 
 
-@pytest.fixture
-def temp_json_file(tmp_path, sample_json_output):
-    """Create a temporary JSON file for testing"""
-    import json
-    
-    json_file = tmp_path / "MrBeast_20251002_143000.json"
+@pytest.fixture(scope="session")
+def temp_json_file(tmp_path_factory, sample_json_output):
+    """Temporary NDJSON file (header line + one line per video), written once per session"""
+    json_file = tmp_path_factory.mktemp("youtube_data") / "MrBeast_20251002_143000.ndjson"
     with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(sample_json_output, f, indent=4)
+        f.write(json.dumps(sample_json_output["header"]) + "\n")
+        for video in sample_json_output["videos"]:
+            f.write(json.dumps(video) + "\n")
     
     return json_file
 
 
+@pytest.fixture
+def videos_df():
+    """Raw video rows (string/NULL counts, one duplicate id) with counts cast to int64 in one vectorized step"""
+    videos = [
+        {"video_id": "video1", "title": "Updated Title", "view_count": "1500", "like_count": "150", "comment_count": "15"},  # UPDATE
+        {"video_id": "video2", "title": "Existing", "view_count": "2000", "like_count": "200", "comment_count": None},     # NO CHANGE
+        {"video_id": "video3", "title": "New Video", "view_count": None, "like_count": None, "comment_count": None},       # INSERT with NULL
+        {"video_id": "video3", "title": "New Video", "view_count": "3000", "like_count": "300", "comment_count": "30"},    # Duplicate (keep last)
+    ]
+    counts = {"view_count": "int64", "like_count": "int64", "comment_count": "int64"}
+    return pd.DataFrame(videos).fillna(dict.fromkeys(counts, 0)).astype(counts)
+
+
 # ==========================================
 # 📅 Date/Time Fixtures
 # ==========================================
@@ -94,26 +152,66 @@ def iso_durations():
 # 🗄️ Database Fixtures (for future integration tests)
 # ==========================================
 
-@pytest.fixture
+# Read-only: shared by every test without a per-test copy
+_PG_PARAMS = MappingProxyType({
+    "host": "localhost",
+    "port": 5432,
+    "database": "youtube_dwh",
+    "user": "postgres",
+    "password": "postgres"
+})
+
+
+@pytest.fixture(scope="session")
 def mock_postgres_connection():
     """Mock PostgreSQL connection for testing"""
     # This would be expanded for actual database tests
-    return {
-        "host": "localhost",
-        "port": 5432,
-        "database": "youtube_dwh",
-        "user": "postgres",
-        "password": "postgres"
-    }
+    return _PG_PARAMS
 
 
 # ==========================================
 # 📁 File System Fixtures
 # ==========================================
 
-@pytest.fixture
-def mock_data_directory(tmp_path):
-    """Create a temporary data directory structure"""
-    data_dir = tmp_path / "youtube_data"
-    data_dir.mkdir()
-    return data_dir
+@pytest.fixture(scope="session")
+def mock_data_directory(tmp_path_factory):
+    """Temporary data directory, created once per session"""
+    return tmp_path_factory.mktemp("youtube_data")
+
+
+# ==========================================
+# 📜 DAG Source Fixtures
+# ==========================================
+
+@pytest.fixture(scope="session")
+def dag_dir_entries():
+    """File names in dags/, listed with a single scandir per session"""
+    with os.scandir(PROJECT_ROOT / "dags") as entries:
+        return {entry.name for entry in entries}
+
+
+@pytest.fixture(scope="session")
+def dag_sources():
+    """DAG files mapped read-only as bytes, once per session (None if a file is missing)"""
+    sources = {}
+    for dag_file in DAG_FILES:
+        try:
+            with open(PROJECT_ROOT / dag_file, 'rb') as f:
+                sources[dag_file] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            sources[dag_file] = None
+    yield sources
+    for mm in sources.values():
+        if mm is not None:
+            mm.close()
+
+
+@pytest.fixture(scope="session")
+def dag_tokens(dag_sources):
+    """Set of DAG_TOKENS present in each DAG file, found in one scan per file"""
+    tokens = {}
+    for dag_file, content in dag_sources.items():
+        found = {t.decode() for t in _DAG_TOKENS_RE.findall(content)} if content is not None else set()
+        # Only the longest token is reported at a given offset: add its prefixes (run_soda)
+        tokens[dag_file] = found | {t for t in DAG_TOKENS for f in found if f.startswith(t)}
+    return tokens
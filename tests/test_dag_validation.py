@@ -6,7 +6,6 @@ Test Count: 6 DAG tests
 """
 
 import pytest
-from pathlib import Path
 
 
 # ==========================================
@@ -14,54 +13,48 @@ from pathlib import Path
 # ==========================================
 
 @pytest.mark.dag
-def test_produce_json_dag_exists():
+def test_produce_json_dag_exists(dag_dir_entries):
     """Test 9: produce_JSON DAG file exists"""
-    dag_file = Path("dags/youtube_extract.py")
-    assert dag_file.exists(), "produce_JSON DAG file not found"
+    assert "youtube_extract.py" in dag_dir_entries, "produce_JSON DAG file not found"
 
 
 @pytest.mark.dag
-def test_update_db_dag_exists():
+def test_update_db_dag_exists(dag_dir_entries):
     """Test 10: update_db DAG file exists"""
-    dag_file = Path("dags/youtube_load_db.py")
-    assert dag_file.exists(), "update_db DAG file not found"
+    assert "youtube_load_db.py" in dag_dir_entries, "update_db DAG file not found"
 
 
 @pytest.mark.dag
-def test_data_quality_dag_exists():
+def test_data_quality_dag_exists(dag_dir_entries):
     """Test 11: data_quality DAG file exists"""
-    dag_file = Path("dags/youtube_data_quality.py")
-    assert dag_file.exists(), "data_quality DAG file not found"
+    assert "youtube_data_quality.py" in dag_dir_entries, "data_quality DAG file not found"
 
 
 @pytest.mark.dag
-def test_produce_json_has_dag_id():
+def test_produce_json_has_dag_id(dag_tokens):
     """Test 12: produce_JSON file contains dag_id definition"""
-    dag_file = Path("dags/youtube_extract.py")
-    content = dag_file.read_text(encoding='utf-8')
+    tokens = dag_tokens["dags/youtube_extract.py"]
     
-    assert 'dag_id' in content, "No dag_id found in produce_JSON"
-    assert 'produce_JSON' in content, "DAG ID 'produce_JSON' not found"
+    assert 'dag_id' in tokens, "No dag_id found in produce_JSON"
+    assert 'produce_JSON' in tokens, "DAG ID 'produce_JSON' not found"
 
 
 @pytest.mark.dag
-def test_update_db_has_dag_id():
+def test_update_db_has_dag_id(dag_tokens):
     """Test 13: update_db file contains dag_id definition"""
-    dag_file = Path("dags/youtube_load_db.py")
-    content = dag_file.read_text(encoding='utf-8')
+    tokens = dag_tokens["dags/youtube_load_db.py"]
     
-    assert 'dag_id' in content, "No dag_id found in update_db"
-    assert 'update_db' in content, "DAG ID 'update_db' not found"
+    assert 'dag_id' in tokens, "No dag_id found in update_db"
+    assert 'update_db' in tokens, "DAG ID 'update_db' not found"
 
 
 @pytest.mark.dag
-def test_data_quality_has_dag_id():
+def test_data_quality_has_dag_id(dag_tokens):
     """Test 14: data_quality file contains dag_id definition"""
-    dag_file = Path("dags/youtube_data_quality.py")
-    content = dag_file.read_text(encoding='utf-8')
+    tokens = dag_tokens["dags/youtube_data_quality.py"]
     
-    assert 'dag_id' in content, "No dag_id found in data_quality"
-    assert 'data_quality' in content, "DAG ID 'data_quality' not found"
+    assert 'dag_id' in tokens, "No dag_id found in data_quality"
+    assert 'data_quality' in tokens, "DAG ID 'data_quality' not found"
 
 
 # ==========================================
@@ -69,32 +62,29 @@ def test_data_quality_has_dag_id():
 # ==========================================
 
 @pytest.mark.dag
-def test_produce_json_has_extract_task():
+def test_produce_json_has_extract_task(dag_tokens):
     """Test 15: produce_JSON has extract_youtube_videos task"""
-    dag_file = Path("dags/youtube_extract.py")
-    content = dag_file.read_text(encoding='utf-8')
+    tokens = dag_tokens["dags/youtube_extract.py"]
     
-    assert 'task_id="extract_youtube_videos"' in content or "task_id='extract_youtube_videos'" in content
+    assert 'task_id="extract_youtube_videos"' in tokens or "task_id='extract_youtube_videos'" in tokens
 
 
 @pytest.mark.dag
-def test_update_db_has_all_tasks():
+def test_update_db_has_all_tasks(dag_tokens):
     """Test 16: update_db has all 4 required tasks"""
-    dag_file = Path("dags/youtube_load_db.py")
-    content = dag_file.read_text(encoding='utf-8')
+    tokens = dag_tokens["dags/youtube_load_db.py"]
     
     required_tasks = ['find_latest_json', 'sync_to_staging', 'transform_to_core', 'trigger_data_quality']
     for task in required_tasks:
-        assert task in content, f"Task {task} not found in update_db"
+        assert task in tokens, f"Task {task} not found in update_db"
 
 
 @pytest.mark.dag
-def test_data_quality_has_soda_task():
+def test_data_quality_has_soda_task(dag_tokens):
     """Test 17: data_quality has run_soda_scan task"""
-    dag_file = Path("dags/youtube_data_quality.py")
-    content = dag_file.read_text(encoding='utf-8')
+    tokens = dag_tokens["dags/youtube_data_quality.py"]
     
-    assert 'run_soda_scan' in content or 'run_soda' in content
+    assert 'run_soda_scan' in tokens or 'run_soda' in tokens
 
 
 # ==========================================
@@ -102,35 +92,31 @@ def test_data_quality_has_soda_task():
 # ==========================================
 
 @pytest.mark.dag
-def test_produce_json_triggers_update_db():
+def test_produce_json_triggers_update_db(dag_tokens):
     """Test 18: produce_JSON triggers update_db DAG"""
-    dag_file = Path("dags/youtube_extract.py")
-    content = dag_file.read_text(encoding='utf-8')
+    tokens = dag_tokens["dags/youtube_extract.py"]
     
-    assert 'TriggerDagRunOperator' in content
-    assert 'trigger_dag_id="update_db"' in content or "trigger_dag_id='update_db'" in content
+    assert 'TriggerDagRunOperator' in tokens
+    assert 'trigger_dag_id="update_db"' in tokens or "trigger_dag_id='update_db'" in tokens
 
 
 @pytest.mark.dag
-def test_update_db_triggers_data_quality():
+def test_update_db_triggers_data_quality(dag_tokens):
     """Test 19: update_db triggers data_quality DAG"""
-    dag_file = Path("dags/youtube_load_db.py")
-    content = dag_file.read_text(encoding='utf-8')
+    tokens = dag_tokens["dags/youtube_load_db.py"]
     
-    assert 'TriggerDagRunOperator' in content
-    assert 'trigger_dag_id="data_quality"' in content or "trigger_dag_id='data_quality'" in content
+    assert 'TriggerDagRunOperator' in tokens
+    assert 'trigger_dag_id="data_quality"' in tokens or "trigger_dag_id='data_quality'" in tokens
 
 
 @pytest.mark.dag
-def test_complete_pipeline_orchestration():
+def test_complete_pipeline_orchestration(dag_tokens):
     """Test 20: Complete pipeline orchestration chain exists"""
     # Check produce_JSON → update_db
-    extract_file = Path("dags/youtube_extract.py").read_text(encoding='utf-8')
-    assert 'update_db' in extract_file
+    assert 'update_db' in dag_tokens["dags/youtube_extract.py"]
     
     # Check update_db → data_quality
-    load_file = Path("dags/youtube_load_db.py").read_text(encoding='utf-8')
-    assert 'data_quality' in load_file
+    assert 'data_quality' in dag_tokens["dags/youtube_load_db.py"]
 
 
 # ==========================================
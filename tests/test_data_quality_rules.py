@@ -9,34 +9,39 @@ Test Count: 12 data quality tests
 import pytest
 import re
 
+from include.duration import SHORT_VIDEO_MAX_SECONDS, duration_label, iso_to_seconds
+
+# Soda check on duration_readable: valid regex '^\d+:\d{2}(:\d{2})?$'
+# (anchors dropped: fullmatch() already matches the whole string)
+_DUR_RE = re.compile(r'\d+:\d{2}(:\d{2})?')
+
+# Soda check on duration_label: valid values ['short', 'long']
+_DUR_LABELS = frozenset({'short', 'long'})
+
 
 # ==========================================
 # ✅ Test 1-4: Video ID Format Validation
 # ==========================================
 
 @pytest.mark.unit
-def test_video_id_length_11_characters():
+@pytest.mark.parametrize("video_id", ["4l97aNza_Zc", "3ih2bPKSWsQ", "pl4xmh3RWfE", "-z349CGAOXs"])
+def test_video_id_length_11_characters(video_id):
     """Test 1: YouTube video IDs must be exactly 11 characters
     
     Corresponds to Soda check: invalid_count(video_id) = 0 with valid length: 11
     """
-    valid_video_ids = ["4l97aNza_Zc", "3ih2bPKSWsQ", "pl4xmh3RWfE", "-z349CGAOXs"]
-    
-    for video_id in valid_video_ids:
-        assert len(video_id) == 11, f"Video ID {video_id} is not 11 characters"
+    assert len(video_id) == 11, f"Video ID {video_id} is not 11 characters"
 
 
 @pytest.mark.unit
-def test_video_id_invalid_length_rejected():
+@pytest.mark.parametrize("video_id", [
+    "abc",           # Too short (3 chars)
+    "abcdefghijkl",  # Too long (12 chars)
+    "",              # Empty
+])
+def test_video_id_invalid_length_rejected(video_id):
     """Test 2: Video IDs with incorrect length should be invalid"""
-    invalid_video_ids = [
-        "abc",           # Too short (3 chars)
-        "abcdefghijkl",  # Too long (12 chars)
-        "",              # Empty
-    ]
-    
-    for video_id in invalid_video_ids:
-        assert len(video_id) != 11, f"Video ID {video_id} should be invalid"
+    assert len(video_id) != 11, f"Video ID {video_id} should be invalid"
 
 
 # ==========================================
@@ -44,19 +49,17 @@ def test_video_id_invalid_length_rejected():
 # ==========================================
 
 @pytest.mark.unit
-def test_title_length_within_range():
+@pytest.mark.parametrize("title", [
+    "A",  # Minimum (1 char)
+    "Survive 30 Days Chained To Your Ex, Win $250,000",  # Normal
+    "X" * 500,  # Maximum (500 chars)
+])
+def test_title_length_within_range(title):
     """Test 3: Title length must be 1-500 characters
     
     Corresponds to Soda check: valid min length: 1, valid max length: 500
     """
-    valid_titles = [
-        "A",  # Minimum (1 char)
-        "Survive 30 Days Chained To Your Ex, Win $250,000",  # Normal
-        "X" * 500,  # Maximum (500 chars)
-    ]
-    
-    for title in valid_titles:
-        assert 1 <= len(title) <= 500, f"Title length {len(title)} is invalid"
+    assert 1 <= len(title) <= 500, f"Title length {len(title)} is invalid"
 
 
 @pytest.mark.unit
@@ -80,59 +83,49 @@ def test_title_too_long_rejected():
 # ==========================================
 
 @pytest.mark.unit
-def test_duration_iso8601_format():
+@pytest.mark.parametrize("duration", [
+    "PT58S",
+    "PT22M26S",
+    "PT1H5M12S",
+    "P1D",  # 1 day (also valid ISO 8601)
+    "PT0S",  # Zero seconds
+], ids=["58s", "22m26s", "1h5m12s", "1day", "0s"])
+def test_duration_iso8601_format(duration):
     """Test 6: Duration must be ISO 8601 format starting with 'P'
     
     Corresponds to Soda check: valid regex: '^P.*'
     """
-    valid_durations = [
-        "PT58S",
-        "PT22M26S",
-        "PT1H5M12S",
-        "P1D",  # 1 day (also valid ISO 8601)
-        "PT0S",  # Zero seconds
-    ]
-    
-    for duration in valid_durations:
-        assert duration.startswith("P"), f"Duration {duration} doesn't start with 'P'"
+    assert duration.startswith("P"), f"Duration {duration} doesn't start with 'P'"
 
 
 @pytest.mark.unit
-def test_duration_readable_format_validation():
+@pytest.mark.parametrize("duration_readable", [
+    "0:35",      # M:SS (seconds < 10 minutes)
+    "13:11",     # MM:SS
+    "1:23:45",   # H:MM:SS
+    "12:05",     # MM:SS
+    "100:59",    # Large minute value
+], ids=["m_ss", "mm_ss", "h_mm_ss", "mm_ss_leading_zero", "large_minutes"])
+def test_duration_readable_format_validation(duration_readable):
     """Test 7: Duration readable must match M:SS or MM:SS or H:MM:SS format
     
     Corresponds to Soda check: valid regex: '^\d+:\d{2}(:\d{2})?$'
     """
-    pattern = r'^\d+:\d{2}(:\d{2})?$'
-    
-    valid_formats = [
-        "0:35",      # M:SS (seconds < 10 minutes)
-        "13:11",     # MM:SS
-        "1:23:45",   # H:MM:SS
-        "12:05",     # MM:SS
-        "100:59",    # Large minute value
-    ]
-    
-    for duration_readable in valid_formats:
-        assert re.match(pattern, duration_readable), f"{duration_readable} doesn't match format"
+    assert _DUR_RE.fullmatch(duration_readable), f"{duration_readable} doesn't match format"
 
 
 @pytest.mark.unit
-def test_duration_readable_invalid_format_rejected():
+@pytest.mark.parametrize("duration_readable", [
+    "5:5",        # Missing leading zero (should be 5:05)
+    "1:2:3",      # Single digit seconds
+    "abc",        # Not a time format
+    "12",         # No colon separator
+    "12:",        # Missing seconds
+    ":30",        # Missing minutes
+], ids=["seconds_one_digit", "hms_one_digit", "not_time", "no_colon", "no_seconds", "no_minutes"])
+def test_duration_readable_invalid_format_rejected(duration_readable):
     """Test 8: Invalid duration_readable formats should be rejected"""
-    pattern = r'^\d+:\d{2}(:\d{2})?$'
-    
-    invalid_formats = [
-        "5:5",        # Missing leading zero (should be 5:05)
-        "1:2:3",      # Single digit seconds
-        "abc",        # Not a time format
-        "12",         # No colon separator
-        "12:",        # Missing seconds
-        ":30",        # Missing minutes
-    ]
-    
-    for duration_readable in invalid_formats:
-        assert not re.match(pattern, duration_readable), f"{duration_readable} should be invalid"
+    assert not _DUR_RE.fullmatch(duration_readable), f"{duration_readable} should be invalid"
 
 
 # ==========================================
@@ -140,20 +133,18 @@ def test_duration_readable_invalid_format_rejected():
 # ==========================================
 
 @pytest.mark.unit
-def test_statistics_non_negative():
+@pytest.mark.parametrize("stats", [
+    {"view_count": 0, "like_count": 0, "comment_count": 0},
+    {"view_count": 1000000, "like_count": 50000, "comment_count": 10000},
+])
+def test_statistics_non_negative(stats):
     """Test 9: View/like/comment counts must be >= 0
     
     Corresponds to Soda checks: valid min: 0 for all counts
     """
-    valid_statistics = [
-        {"view_count": 0, "like_count": 0, "comment_count": 0},
-        {"view_count": 1000000, "like_count": 50000, "comment_count": 10000},
-    ]
-    
-    for stats in valid_statistics:
-        assert stats["view_count"] >= 0
-        assert stats["like_count"] >= 0
-        assert stats["comment_count"] >= 0
+    assert stats["view_count"] >= 0
+    assert stats["like_count"] >= 0
+    assert stats["comment_count"] >= 0
 
 
 @pytest.mark.unit
@@ -196,16 +187,14 @@ def test_duration_label_enum_validation():
     
     Corresponds to Soda check: valid values: ['short', 'long']
     """
-    valid_labels = ['short', 'long']
-    
-    # Valid cases
-    for label in valid_labels:
-        assert label in ['short', 'long']
+    # Valid cases: every label the extractor can emit
+    for label in (duration_label(0), duration_label(SHORT_VIDEO_MAX_SECONDS)):
+        assert label in _DUR_LABELS
     
     # Invalid cases
     invalid_labels = ['medium', 'very_long', 'SHORT', 'Long', '']
     for label in invalid_labels:
-        assert label not in ['short', 'long']
+        assert label not in _DUR_LABELS
 
 
 # ==========================================
@@ -230,8 +219,8 @@ def test_complete_video_data_quality():
     assert len(video_data["video_id"]) == 11  # ✅ Video ID format
     assert 1 <= len(video_data["title"]) <= 500  # ✅ Title length
     assert video_data["duration"].startswith("P")  # ✅ ISO 8601 duration
-    assert re.match(r'^\d+:\d{2}(:\d{2})?$', video_data["duration_readable"])  # ✅ Duration readable
-    assert video_data["duration_label"] in ['short', 'long']  # ✅ Duration label enum
+    assert _DUR_RE.fullmatch(video_data["duration_readable"])  # ✅ Duration readable
+    assert video_data["duration_label"] in _DUR_LABELS  # ✅ Duration label enum
     assert video_data["view_count"] >= 0  # ✅ Non-negative views
     assert video_data["like_count"] >= 0  # ✅ Non-negative likes
     assert video_data["comment_count"] >= 0  # ✅ Non-negative comments
@@ -239,8 +228,6 @@ def test_complete_video_data_quality():
     assert video_data["comment_count"] <= video_data["view_count"]  # ✅ Business rule
     
     # Duration label consistency check
-    import isodate
-    td = isodate.parse_duration(video_data["duration"])
-    total_seconds = int(td.total_seconds())
+    total_seconds = iso_to_seconds(video_data["duration"])
     expected_label = 'short' if total_seconds < 60 else 'long'
     assert video_data["duration_label"] == expected_label  # ✅ Label matches duration
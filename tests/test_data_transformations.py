@@ -10,14 +10,14 @@ import json
 
 
 # ==========================================
-# ✅ Test 15-17: Data Type Conversions (sync_to_staging function)
+# ✅ Test 15-17: Data Type Conversions (parse_video function)
 # ==========================================
 
 @pytest.mark.unit
 def test_view_count_string_to_int():
-    """Test 15: View count converts from string to integer (line 96 youtube_load_db.py)"""
+    """Test 15: View count converts from string to integer (parse_video in youtube_extract.py)"""
     view_count_str = "54506132"
-    # Simulates: int(video.get('view_count', 0))
+    # Simulates: int(video["statistics"].get("viewCount") or 0)
     view_count_int = int(view_count_str)
     
     assert isinstance(view_count_int, int)
@@ -26,9 +26,9 @@ def test_view_count_string_to_int():
 
 @pytest.mark.unit
 def test_like_count_string_to_int():
-    """Test 16: Like count converts from string to integer (line 97 youtube_load_db.py)"""
+    """Test 16: Like count converts from string to integer (parse_video in youtube_extract.py)"""
     like_count_str = "1833636"
-    # Simulates: int(video.get('like_count', 0))
+    # Simulates: int(video["statistics"].get("likeCount") or 0)
     like_count_int = int(like_count_str)
     
     assert isinstance(like_count_int, int)
@@ -40,7 +40,7 @@ def test_comment_count_handles_missing_value():
     """Test 17: Comment count handles missing/None values with default 0"""
     video_data = {"comment_count": None}
     
-    # Simulates: int(video.get("comment_count", 0))
+    # Simulates: int(video["statistics"].get("commentCount") or 0)
     comment_count = int(video_data.get("comment_count", 0) or 0)
     
     assert comment_count == 0
@@ -78,22 +78,27 @@ def test_video_id_correct_length(sample_video_data):
 
 
 # ==========================================
-# ✅ Test 20: JSON File Parsing (find_latest_json function)
+# ✅ Test 20: NDJSON File Parsing (sync_to_staging function)
 # ==========================================
 
 @pytest.mark.unit
 def test_json_file_is_valid(temp_json_file):
-    """Test 20: JSON file can be read and parsed correctly (line 44 youtube_load_db.py)"""
-    # Simulates: with open(json_file, 'r', encoding='utf-8') as f: data = json.load(f)
+    """Test 20: NDJSON file can be read and parsed line by line (sync_to_staging)"""
+    # Simulates: header = orjson.loads(f.readline()); for line in f: video = orjson.loads(line)
     with open(temp_json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+        header = json.loads(f.readline())
+        videos = [json.loads(line) for line in f if line.strip()]
     
     # Validate structure matches produce_JSON output
-    assert "channel_handle" in data
-    assert "videos" in data
-    assert isinstance(data["videos"], list)
-    assert len(data["videos"]) > 0
-    assert "extraction_date" in data
+    assert "channel_handle" in header
+    assert "extraction_date" in header
+    assert len(videos) > 0
+    assert all("video_id" in video for video in videos)
+    # Counts are typed at extraction: sync_to_staging writes them verbatim
+    assert all(isinstance(video["view_count"], int) for video in videos)
+    # Duration columns are precomputed at extraction too
+    assert all(isinstance(video["duration_seconds"], int) for video in videos)
+    assert all("duration_label" in video for video in videos)
 
 
 # ==========================================
@@ -103,7 +108,7 @@ def test_json_file_is_valid(temp_json_file):
 """
 DATA TRANSFORMATION TESTS SUMMARY (6 tests):
 
-Type Conversions (sync_to_staging):
+Type Conversions (parse_video):
 15. test_view_count_string_to_int - String to Integer
 16. test_like_count_string_to_int - String to Integer
 17. test_comment_count_handles_missing_value - Null handling to 0
@@ -113,7 +118,7 @@ Duplicate Handling:
 19. test_video_id_correct_length - Format validation (11 chars)
 
 JSON Processing:
-20. test_json_file_is_valid - JSON parsing from produce_JSON output
+20. test_json_file_is_valid - NDJSON parsing from produce_JSON output
 
 Total: 20/20 tests complete
 """
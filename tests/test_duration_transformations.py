@@ -1,52 +1,29 @@
 """
 🧪 Duration Transformation Tests
 Tests for ISO 8601 duration conversion and labeling logic
-Tests the actual transformation used in transform_to_core() function
+Tests the actual labelling used by produce_JSON before loading into staging/core
 
 Test Count: 10 duration transformation tests
 """
 
 import pytest
+import numpy as np
+from include.duration import SHORT_VIDEO_MAX_SECONDS, duration_label, iso_to_seconds
 
 
 # ==========================================
-# ✅ Test 1-4: Duration Label Logic (from youtube_load_db.py lines 219-221)
+# ✅ Test 1-4: Duration Label Logic (include/duration.py, applied at extraction)
 # ==========================================
 
 @pytest.mark.unit
-def test_duration_label_short_for_under_60_seconds():
-    """Test 1: Duration < 60 seconds labeled as 'short'"""
-    total_seconds = 59
-    duration_label = 'short' if total_seconds < 60 else 'long'
-    
-    assert duration_label == 'short'
-
-
-@pytest.mark.unit
-def test_duration_label_long_for_60_seconds():
-    """Test 2: Duration = 60 seconds labeled as 'long'"""
-    total_seconds = 60
-    duration_label = 'short' if total_seconds < 60 else 'long'
-    
-    assert duration_label == 'long'
-
-
-@pytest.mark.unit
-def test_duration_label_long_for_over_60_seconds():
-    """Test 3: Duration > 60 seconds labeled as 'long'"""
-    total_seconds = 3661  # 1 hour 1 minute 1 second
-    duration_label = 'short' if total_seconds < 60 else 'long'
-    
-    assert duration_label == 'long'
-
-
-@pytest.mark.unit
-def test_duration_label_boundary_59_seconds():
-    """Test 4: Boundary test - 59 seconds is 'short'"""
-    total_seconds = 59
-    duration_label = 'short' if total_seconds < 60 else 'long'
-    
-    assert duration_label == 'short'
+@pytest.mark.parametrize("total_seconds, expected_label", [
+    (59, 'short'),    # Test 1: < 60 seconds (also the boundary case)
+    (60, 'long'),     # Test 2: exactly 60 seconds
+    (3661, 'long'),   # Test 3: 1 hour 1 minute 1 second
+], ids=["59s", "60s", "1h1m1s"])
+def test_duration_label(total_seconds, expected_label):
+    """Test 1-4: Duration < 60 seconds labeled 'short', otherwise 'long'"""
+    assert duration_label(total_seconds) == expected_label
 
 
 # ==========================================
@@ -59,16 +36,14 @@ def test_iso_duration_pt_format():
     duration = "PT22M26S"
     
     assert duration.startswith("PT")
-    assert "M" in duration or "S" in duration or "H" in duration
+    assert not {"H", "M", "S"}.isdisjoint(duration)  # One pass over the string
 
 
 @pytest.mark.unit
 def test_iso_duration_short_video():
     """Test 6: Short video duration (PT58S = 58 seconds)"""
-    import isodate
     duration = "PT58S"
-    td = isodate.parse_duration(duration)
-    total_seconds = int(td.total_seconds())
+    total_seconds = iso_to_seconds(duration)
     
     assert total_seconds == 58
     assert total_seconds < 60  # Should be labeled 'short'
@@ -77,10 +52,8 @@ def test_iso_duration_short_video():
 @pytest.mark.unit
 def test_iso_duration_medium_video():
     """Test 7: Medium video duration (PT22M26S = 1346 seconds)"""
-    import isodate
     duration = "PT22M26S"
-    td = isodate.parse_duration(duration)
-    total_seconds = int(td.total_seconds())
+    total_seconds = iso_to_seconds(duration)
     
     assert total_seconds == 1346
     assert total_seconds >= 60  # Should be labeled 'long'
@@ -89,10 +62,8 @@ def test_iso_duration_medium_video():
 @pytest.mark.unit
 def test_iso_duration_long_video_with_hours():
     """Test 8: Long video with hours (PT1H23M45S)"""
-    import isodate
     duration = "PT1H23M45S"
-    td = isodate.parse_duration(duration)
-    total_seconds = int(td.total_seconds())
+    total_seconds = iso_to_seconds(duration)
     
     expected_seconds = (1 * 3600) + (23 * 60) + 45  # 5025 seconds
     assert total_seconds == expected_seconds
@@ -106,27 +77,23 @@ def test_iso_duration_long_video_with_hours():
 @pytest.mark.unit
 def test_duration_exactly_one_minute():
     """Test 9: Exactly 1 minute (PT1M = 60 seconds) is 'long'"""
-    import isodate
     duration = "PT1M"
-    td = isodate.parse_duration(duration)
-    total_seconds = int(td.total_seconds())
-    duration_label = 'short' if total_seconds < 60 else 'long'
+    total_seconds = iso_to_seconds(duration)
+    label = duration_label(total_seconds)
     
     assert total_seconds == 60
-    assert duration_label == 'long'
+    assert label == 'long'
 
 
 @pytest.mark.unit
 def test_duration_very_short_video():
     """Test 10: Very short video (PT1S = 1 second) is 'short'"""
-    import isodate
     duration = "PT1S"
-    td = isodate.parse_duration(duration)
-    total_seconds = int(td.total_seconds())
-    duration_label = 'short' if total_seconds < 60 else 'long'
+    total_seconds = iso_to_seconds(duration)
+    label = duration_label(total_seconds)
     
     assert total_seconds == 1
-    assert duration_label == 'short'
+    assert label == 'short'
 
 
 # ==========================================
@@ -141,8 +108,6 @@ def test_mrbeast_duration_distribution():
     - 144 short videos (< 60 seconds)
     - 760 long videos (>= 60 seconds)
     """
-    import isodate
-    
     # Sample durations from actual MrBeast channel
     sample_durations = [
         "PT58S",       # Short (58 seconds)
@@ -153,18 +118,11 @@ def test_mrbeast_duration_distribution():
         "PT1H5M12S",   # Long (1:05:12)
     ]
     
-    short_count = 0
-    long_count = 0
+    secs = np.array([iso_to_seconds(d) for d in sample_durations], dtype=np.int64)
     
-    for duration in sample_durations:
-        td = isodate.parse_duration(duration)
-        total_seconds = int(td.total_seconds())
-        duration_label = 'short' if total_seconds < 60 else 'long'
-        
-        if duration_label == 'short':
-            short_count += 1
-        else:
-            long_count += 1
+    # One vectorized comparison + reduction instead of a branch per video
+    short_count = int((secs < SHORT_VIDEO_MAX_SECONDS).sum())
+    long_count = len(secs) - short_count
     
     # Verify both types exist in sample
     assert short_count == 2  # PT58S and PT35S
@@ -2,77 +2,44 @@
 🧪 Unit Tests - Helper Functions
 Simple tests for utility functions in the YouTube ELT pipeline
 
-Test Count: 8 unit tests
+Test Count: 10 unit tests
 """
 
 import pytest
-import isodate
+from include.duration import iso_duration_to_readable
 
 
 # ==========================================
-# 🔧 Helper Function (copied from DAG)
-# ==========================================
-
-def iso_duration_to_readable(duration):
-    """Convert ISO 8601 duration to readable format (HH:MM:SS or MM:SS)"""
-    try:
-        td = isodate.parse_duration(duration)
-        total_seconds = int(td.total_seconds())
-        minutes, seconds = divmod(total_seconds, 60)
-        hours, minutes = divmod(minutes, 60)
-        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours > 0 else f"{minutes}:{seconds:02d}"
-    except:
-        return "0:00"
-
-
-# ==========================================
-# ✅ Test 1-5: ISO Duration Conversion
+# ✅ Test 1-6: ISO Duration Conversion (and invalid input)
 # ==========================================
 
 @pytest.mark.unit
-def test_iso_duration_minutes_seconds():
-    """Test 1: Convert PT37M4S to 37:04"""
-    result = iso_duration_to_readable("PT37M4S")
-    assert result == "37:04"
+@pytest.mark.parametrize("iso, expected", [
+    ("PT37M4S", "37:04"),       # Test 1: minutes + seconds
+    ("PT35S", "0:35"),          # Test 2: seconds only
+    ("PT1H23M45S", "1:23:45"),  # Test 3: with hours
+    ("PT5M", "5:00"),           # Test 4: minutes only
+    ("PT2H", "2:00:00"),        # Test 5: hours only
+    ("INVALID", "0:00"),        # Test 6: invalid input → default 0:00
+])
+def test_iso_duration_readable(iso, expected):
+    """Test 1-6: Convert ISO 8601 durations to readable format"""
+    assert iso_duration_to_readable(iso) == expected
 
 
 @pytest.mark.unit
-def test_iso_duration_seconds_only():
-    """Test 2: Convert PT35S to 0:35"""
-    result = iso_duration_to_readable("PT35S")
-    assert result == "0:35"
+def test_iso_duration_with_days():
+    """Test 6b: Live streams longer than a day (P1DT2H) roll into hours"""
+    result = iso_duration_to_readable("P1DT2H")
+    assert result == "26:00:00"
 
 
 @pytest.mark.unit
-def test_iso_duration_with_hours():
-    """Test 3: Convert PT1H23M45S to 1:23:45"""
-    result = iso_duration_to_readable("PT1H23M45S")
-    assert result == "1:23:45"
-
-
-@pytest.mark.unit
-def test_iso_duration_minutes_only():
-    """Test 4: Convert PT5M to 5:00"""
-    result = iso_duration_to_readable("PT5M")
-    assert result == "5:00"
-
-
-@pytest.mark.unit
-def test_iso_duration_hours_only():
-    """Test 5: Convert PT2H to 2:00:00"""
-    result = iso_duration_to_readable("PT2H")
-    assert result == "2:00:00"
-
-
-# ==========================================
-# ✅ Test 6: Invalid Duration Handling
-# ==========================================
-
-@pytest.mark.unit
-def test_iso_duration_invalid_format():
-    """Test 6: Invalid duration returns default 0:00"""
-    result = iso_duration_to_readable("INVALID")
-    assert result == "0:00"
+def test_iso_duration_malformed_pt_form():
+    """Test 6c: Out-of-order or signed PT components are invalid (0:00)"""
+    assert iso_duration_to_readable("PT5S5M") == "0:00"
+    assert iso_duration_to_readable("PT-5M") == "0:00"
+    assert iso_duration_to_readable("PT5.5S") == "0:00"
 
 
 # ==========================================
@@ -93,32 +60,30 @@ def test_video_data_has_required_fields(sample_video_data):
 
 @pytest.mark.unit
 def test_json_output_structure(sample_json_output):
-    """Test 8: JSON output has correct structure"""
-    # Check top-level fields
-    assert "channel_handle" in sample_json_output
-    assert "extraction_date" in sample_json_output
-    assert "total_videos" in sample_json_output
-    assert "videos" in sample_json_output
+    """Test 8: JSON output has correct structure (NDJSON header + parse_video records)"""
+    # Check header fields (read by sync_to_staging from the first line)
+    header = sample_json_output["header"]
+    assert set(header) == {"channel_handle", "channel_id", "extraction_date"}
     
-    # Check videos is a list
+    # Every record carries the fields sync_to_staging writes to staging
+    record_fields = {
+        "video_id", "title", "published_at", "duration", "duration_readable",
+        "duration_seconds", "duration_label", "view_count", "like_count", "comment_count",
+    }
     assert isinstance(sample_json_output["videos"], list)
-    
-    # Check total_videos matches actual count
-    assert sample_json_output["total_videos"] == len(sample_json_output["videos"])
+    for video in sample_json_output["videos"]:
+        assert set(video) == record_fields
 
 
 # ==========================================
 # 📊 Test Summary
 # ==========================================
 """
-✅ UNIT TESTS SUMMARY (8 tests):
-
-1. test_iso_duration_minutes_seconds - PT37M4S → 37:04
-2. test_iso_duration_seconds_only - PT35S → 0:35
-3. test_iso_duration_with_hours - PT1H23M45S → 1:23:45
-4. test_iso_duration_minutes_only - PT5M → 5:00
-5. test_iso_duration_hours_only - PT2H → 2:00:00
-6. test_iso_duration_invalid_format - Invalid input handling
+✅ UNIT TESTS SUMMARY (10 tests):
+
+1-6. test_iso_duration_readable - PT37M4S, PT35S, PT1H23M45S, PT5M, PT2H, invalid input
+6b. test_iso_duration_with_days - P1DT2H → 26:00:00
+6c. test_iso_duration_malformed_pt_form - Malformed PT components → 0:00
 7. test_video_data_has_required_fields - Required fields validation
 8. test_json_output_structure - JSON structure validation
 